@@ -16,9 +16,20 @@
 
 from __future__ import print_function
 
+import bisect
 import json
+import os
 import sys
 
+try:
+    import orjson
+
+    def _dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj, indent=2).encode('utf-8')
+
 import ida_bytes
 import ida_entry
 import ida_funcs
@@ -30,6 +41,41 @@ import ida_pro
 import ida_segment
 import ida_typeinf
 
+#flush the dump in 1 MiB chunks
+_WRITE_BUFFER_SIZE = 1 << 20
+
+#https://www.hex-rays.com/products/ida/support/sdkdoc/group___a_l_o_c__.html
+_ARGLOC = {
+    0: 'none',
+    1: 'stack',
+    2: 'distributed',
+    3: 'register_one',
+    4: 'register_pair',
+    5: 'register_relative',
+    6: 'global_address'
+}
+
+#https://www.hex-rays.com/products/ida/support/sdkdoc/group___c_m___c_c__.html
+#indexed by (cc >> 4)
+_CALLINGCONVENTION = (
+    'invalid',          # 0x00
+    'unknown',          # 0x10
+    'voidarg',          # 0x20
+    'cdecl',            # 0x30
+    'cdecl_ellipsis',   # 0x40
+    'stdcall',          # 0x50
+    'pascal',           # 0x60
+    'fastcall',         # 0x70
+    'thiscall',         # 0x80
+    'manual',           # 0x90
+    'spoiled',          # 0xA0
+    'reserved',         # 0xB0
+    'reserved',         # 0xC0
+    'special_ellipsis', # 0xD0
+    'special_pstack',   # 0xE0
+    'special'           # 0xF0
+)
+
 class DumpInfo():
     def __init__(self):
         pass
@@ -41,79 +87,50 @@ class DumpInfo():
     def dump_info(self, filepath):
         self._base = ida_nalt.get_imagebase()
 
-        output = {
-            'general'   : self.__process_general(), 
-            'segments'  : self.__process_segments(),
-            'exports'   : self.__process_exports(),
-            'functions' : self.__process_functions(),
-            'names'     : self.__process_names()
-        }
-
-        with open(filepath, "w") as f:
-            json.dump(output, f, indent=4)
+        #scratch objects for __process_function_typeinfo
+        self._tinfo = ida_typeinf.tinfo_t()
+        self._func_type_data = ida_typeinf.func_type_data_t()
+
+        #sections are streamed record by record
+        filepath_tmp = filepath + '.tmp'
+        try:
+            with open(filepath_tmp, "wb", buffering=_WRITE_BUFFER_SIZE) as f:
+                f.write(b'{\n  "general": ')
+                f.write(_dumps(self.__process_general()).replace(b'\n', b'\n  '))
+                self.__write_array(f, 'segments', self.__process_segments())
+                self.__write_array(f, 'exports', self.__process_exports())
+                self.__write_array(f, 'functions', self.__process_functions())
+                self.__write_array(f, 'names', self.__process_names())
+                f.write(b'\n}')
+
+            #replace the previous dump only when complete
+            os.replace(filepath_tmp, filepath)
+        except BaseException:
+            if os.path.exists(filepath_tmp):
+                os.remove(filepath_tmp)
+            raise
 
 
     #
     # private
     #
 
+    def __write_array(self, f, key, records):
+        f.write(b',\n  "' + key.encode('utf-8') + b'": [')
+
+        separator = b'\n    '
+        for record in records:
+            f.write(separator + _dumps(record).replace(b'\n', b'\n    '))
+            separator = b',\n    '
+
+        #empty arrays stay on one line
+        f.write(b']' if separator == b'\n    ' else b'\n  ]')
+
     def __describe_argloc(self, location):
-        #https://www.hex-rays.com/products/ida/support/sdkdoc/group___a_l_o_c__.html
-        if   location == 0:
-            return 'none'
-        elif location == 1:
-            return 'stack'
-        elif location == 2:
-            return 'distributed'
-        elif location == 3:
-            return 'register_one'
-        elif location == 4:
-            return 'register_pair'
-        elif location == 5:
-            return 'register_relative'
-        elif location == 6:
-            return 'global_address'
-        else:
-            return 'custom'
-        
-        return None
+        return _ARGLOC.get(location, 'custom')
 
     def __describe_callingconvention(self, cc):
-        #https://www.hex-rays.com/products/ida/support/sdkdoc/group___c_m___c_c__.html
-        if cc == 0x00:
-            return 'invalid'
-        elif cc == 0x10:
-            return 'unknown'
-        elif cc == 0x20:
-            return 'voidarg'
-        elif cc == 0x30:
-            return 'cdecl'
-        elif cc == 0x40:
-            return 'cdecl_ellipsis'
-        elif cc == 0x50:
-            return 'stdcall'
-        elif cc == 0x60:
-            return 'pascal'
-        elif cc == 0x70:
-            return 'fastcall'
-        elif cc == 0x80:
-            return 'thiscall'
-        elif cc == 0x90:
-            return 'manual'
-        elif cc == 0xA0:
-            return 'spoiled'
-        elif cc == 0xB0:
-            return 'reserved'
-        elif cc == 0xC0:
-            return 'reserved'
-        elif cc == 0xD0:
-            return 'special_ellipsis'
-        elif cc == 0xE0:
-            return 'special_pstack'
-        elif cc == 0xF0:
-            return 'special'
-
-        return None
+        return _CALLINGCONVENTION[(cc >> 4) & 0xF]
 
     def __process_general(self):
         #
@@ -145,9 +162,7 @@ class DumpInfo():
         return result
 
     def __process_segments(self):
-        segments = list()
-
-        for n in range(0, ida_segment.get_segm_qty()):
+        for n in range(ida_segment.get_segm_qty()):
             seg = ida_segment.getnseg(n)
             if seg:
                 segm = {
@@ -157,65 +172,86 @@ class DumpInfo():
                     'selector'  : seg.sel
                 }
                 
-                segments.append(segm)
-
-        return segments
+                yield segm
 
     def __process_function_typeinfo(self, info, func):
+        print_tinfo = ida_typeinf.print_tinfo
+        PRTYPE_1LINE = ida_typeinf.PRTYPE_1LINE
+
+        tinfo = self._tinfo
+        tinfo.clear()
+        func_type_data = self._func_type_data
+        func_type_data.clear()
 
-        tinfo = ida_typeinf.tinfo_t()
-        func_type_data = ida_typeinf.func_type_data_t()
         if ida_pro.IDA_SDK_VERSION >= 740:
             ida_typeinf.guess_tinfo(tinfo,func.start_ea)
         else:
             ida_typeinf.guess_tinfo(func.start_ea,tinfo)
-        tinfo.get_func_details(func_type_data)
+        if not tinfo.get_func_details(func_type_data):
+            info['calling_convention'] = 'invalid'
+            info['return_type'] = ''
+            info['arguments'] = []
+            return
 
         #calling convention
         info['calling_convention'] = self.__describe_callingconvention(func_type_data.cc)
-        func_type_data.rettype
         
         #return tpye
-        info['return_type'] = ida_typeinf.print_tinfo('', 0, 0, ida_typeinf.PRTYPE_1LINE, func_type_data.rettype, '', '')
+        info['return_type'] = print_tinfo('', 0, 0, PRTYPE_1LINE, func_type_data.rettype, '', '')
 
         #arguments
-        arguments = list()
-        
-        for funcarg in func_type_data:
-            arginfo = {
+        describe_argloc = self.__describe_argloc
+        info['arguments'] = [
+            {
                 'name'              : funcarg.name,
-                'type'              : ida_typeinf.print_tinfo('', 0, 0, ida_typeinf.PRTYPE_1LINE, funcarg.type, '', ''),
-                'argument_location' : self.__describe_argloc(funcarg.argloc.atype())
+                'type'              : print_tinfo('', 0, 0, PRTYPE_1LINE, funcarg.type, '', ''),
+                'argument_location' : describe_argloc(funcarg.argloc.atype())
             }
-            
-            arguments.append(arginfo)
-
-        info['arguments'] = arguments
+            for funcarg in func_type_data
+        ]
 
     def __process_function_labels(self, func):
         labels = list()
 
-        it = ida_funcs.func_item_iterator_t()
-        if not it.set(func):
-            return labels
-
-        while it.next_code():
-            ea = it.current()
-            name = ida_name.get_visible_name(ea, ida_name.GN_LOCAL)
-
-            if name != '':
-                labels.append({
-                    'offset'       : ea - func.start_ea,
-                    'name'         : name,
-                    'is_public'    : ida_name.is_public_name(ea),
-                    'is_autonamed' : ida_bytes.get_full_flags(ea) & ida_bytes.FF_LABL != 0
-                })
+        get_visible_name = ida_name.get_visible_name
+        GN_LOCAL = ida_name.GN_LOCAL
+        is_public_name = ida_name.is_public_name
+        get_full_flags = ida_bytes.get_full_flags
+        next_head = ida_bytes.next_head
+        FF_LABL = ida_bytes.FF_LABL
+        FF_ANYNAME = ida_bytes.FF_ANYNAME
+        FF_CODE = ida_bytes.FF_CODE
+        MS_CLS = ida_bytes.MS_CLS
+        func_start = func.start_ea
+
+        chunks = ida_funcs.func_tail_iterator_t(func)
+        ok = chunks.main()
+        while ok:
+            chunk = chunks.chunk()
+            chunk_end = chunk.end_ea
+
+            ea = chunk.start_ea
+            while ea < chunk_end:
+                #the function start is dumped as the function itself
+                flags = get_full_flags(ea)
+                if ea != func_start and (flags & MS_CLS) == FF_CODE and (flags & FF_ANYNAME) != 0:
+                    name = get_visible_name(ea, GN_LOCAL)
+
+                    if name != '':
+                        labels.append({
+                            'offset'       : ea - func_start,
+                            'name'         : name,
+                            'is_public'    : is_public_name(ea),
+                            'is_autonamed' : (flags & FF_LABL) != 0
+                        })
+
+                ea = next_head(ea, chunk_end)
+
+            ok = chunks.next()
 
         return labels
 
     def __process_functions(self):
-        functions = list()
-
         #
         # ida_ida.inf_get_max_ea()
         #
@@ -232,80 +268,106 @@ class DumpInfo():
         
         func = chunk
 
+        get_full_flags = ida_bytes.get_full_flags
+        get_func_name = ida_funcs.get_func_name
+        is_public_name = ida_name.is_public_name
+        get_next_func = ida_funcs.get_next_func
+        FF_LABL = ida_bytes.FF_LABL
+        base = self._base
+
         while func and func.start_ea < end:
             start_ea = func.start_ea
+            start_rva = start_ea - base
             
-            func_flags = ida_bytes.get_full_flags(start_ea)
-            func_name = ida_funcs.get_func_name(start_ea)
-            func_autonamed = func_flags & ida_bytes.FF_LABL != 0
-            func_public = ida_name.is_public_name(start_ea)
+            func_flags = get_full_flags(start_ea)
+            func_name = get_func_name(start_ea)
+            func_autonamed = (func_flags & FF_LABL) != 0
+            func_public = is_public_name(start_ea)
 
             function = {
-                'start_rva'    : start_ea - self._base,
+                'start_rva'    : start_rva,
                 'name'         : func_name,
                 'is_public'    : func_public,
                 'is_autonamed' : func_autonamed
             }
 
             # PE32/PE32+ only support binaries up to 2GB
-            if function['start_rva'] >= 2**32:
-                print('RVA out of range for function: ' + function['name'], file=sys.stderr)
+            if start_rva >= 2**32:
+                print('RVA out of range for function: ' + func_name, file=sys.stderr)
 
             self.__process_function_typeinfo(function, func)
 
             function['labels'] = self.__process_function_labels(func)
 
-            functions.append(function)
-
-            func = ida_funcs.get_next_func(start_ea)
+            yield function
 
-        return functions
+            func = get_next_func(start_ea)
 
     def __process_names(self):
-        names = list()
-
-        for i in range(0, ida_name.get_nlist_size()):
-            ea = ida_name.get_nlist_ea(i)
-            if ida_funcs.get_func(ea) is not None:
+        get_nlist_ea = ida_name.get_nlist_ea
+        get_nlist_name = ida_name.get_nlist_name
+        is_public_name = ida_name.is_public_name
+        bisect_right = bisect.bisect_right
+        base = self._base
+
+        #function chunk ranges, sorted by start
+        chunk_starts = list()
+        chunk_ends = list()
+        for n in range(ida_funcs.get_fchunk_qty()):
+            chunk = ida_funcs.getn_fchunk(n)
+            chunk_starts.append(chunk.start_ea)
+            chunk_ends.append(chunk.end_ea)
+
+        for i in range(ida_name.get_nlist_size()):
+            ea = get_nlist_ea(i)
+
+            # names inside functions are dumped as function labels
+            idx = bisect_right(chunk_starts, ea) - 1
+            if idx >= 0 and ea < chunk_ends[idx]:
                 continue
 
+            rva = ea - base
+            name_str = get_nlist_name(i)
+
             name = {
-                'rva'       : ea - self._base,
-                'name'      : ida_name.get_nlist_name(i),
-                'is_public' : ida_name.is_public_name(ea),
-                'is_func'   : ida_funcs.get_func(ea) is not None
+                'rva'       : rva,
+                'name'      : name_str,
+                'is_public' : is_public_name(ea),
+                'is_func'   : False
             }
 
             # PE32/PE32+ only support binaries up to 2GB
-            if name['rva'] >= 2**32:
-                print('RVA out of range for name: ' + name['name'], file=sys.stderr)
-
-            names.append(name)
+            if rva >= 2**32:
+                print('RVA out of range for name: ' + name_str, file=sys.stderr)
 
-        return names
+            yield name
 
     def __process_exports(self):
-        exports = list()
+        get_entry_ordinal = ida_entry.get_entry_ordinal
+        get_entry = ida_entry.get_entry
+        get_entry_name = ida_entry.get_entry_name
+        get_full_flags = ida_bytes.get_full_flags
+        is_func = ida_bytes.is_func
+        is_data = ida_bytes.is_data
+        base = self._base
 
-        for i in range(0, ida_entry.get_entry_qty()):
-            ordinal = ida_entry.get_entry_ordinal(i)
+        for i in range(ida_entry.get_entry_qty()):
+            ordinal = get_entry_ordinal(i)
 
-            ea = ida_entry.get_entry(ordinal)
+            ea = get_entry(ordinal)
 
-            flags = ida_bytes.get_full_flags(ea)
+            flags = get_full_flags(ea)
             type = 'unknown'
-            if ida_bytes.is_func(flags):
+            if is_func(flags):
                 type = 'function'
-            elif ida_bytes.is_data(flags):
+            elif is_data(flags):
                 type = 'data'
 
             export = {
                 'ordinal' : ordinal,
-                'rva'     : ea - self._base,
-                'name'    : ida_entry.get_entry_name(ordinal),
+                'rva'     : ea - base,
+                'name'    : get_entry_name(ordinal),
                 'type'    : type
             }
 
-            exports.append(export)
-
-        return exports
+            yield export